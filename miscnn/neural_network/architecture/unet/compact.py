@@ -30,11 +30,11 @@
 #                   Library imports                   #
 #-----------------------------------------------------#
 # External libraries
-from keras.models import Model
-from keras.layers import Input, concatenate
-from keras.layers import Conv3D, MaxPooling3D, Conv3DTranspose
-from keras.layers import Conv2D, MaxPooling2D, Conv2DTranspose
-from keras.layers import BatchNormalization
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import Input, concatenate
+from tensorflow.keras.layers import Conv3D, MaxPooling3D, Conv3DTranspose
+from tensorflow.keras.layers import Conv2D, MaxPooling2D, Conv2DTranspose
+from tensorflow.keras.layers import BatchNormalization, Activation
 # Internal libraries/scripts
 from miscnn.neural_network.architecture.abstract_architecture import Abstract_Architecture
 
@@ -96,8 +96,9 @@ class Architecture(Abstract_Architecture):
                                            self.ba_norm_momentum)
 
         # Output Layer
-        conv_out = Conv2D(n_labels, (1, 1),
-                   activation=self.activation)(cnn_chain)
+        conv_out = Conv2D(n_labels, (1, 1))(cnn_chain)
+        # Compute the activation in float32 (also under mixed precision)
+        conv_out = Activation(self.activation, dtype="float32")(conv_out)
         # Create Model with associated input and output layers
         model = Model(inputs=[inputs], outputs=[conv_out])
         # Return model
@@ -136,8 +137,9 @@ class Architecture(Abstract_Architecture):
                                            self.ba_norm_momentum)
 
         # Output Layer
-        conv_out = Conv3D(n_labels, (1, 1, 1),
-                   activation=self.activation)(cnn_chain)
+        conv_out = Conv3D(n_labels, (1, 1, 1))(cnn_chain)
+        # Compute the activation in float32 (also under mixed precision)
+        conv_out = Activation(self.activation, dtype="float32")(conv_out)
         # Create Model with associated input and output layers
         model = Model(inputs=[inputs], outputs=[conv_out])
         # Return model
@@ -20,7 +20,7 @@
 #                   Library imports                   #
 #-----------------------------------------------------#
 #External libraries
-import keras
+from tensorflow import keras
 import math
 import numpy as np
 from miscnn.utils.visualizer import visualize_sample
@@ -20,10 +20,21 @@
 #                   Library imports                   #
 #-----------------------------------------------------#
 # External libraries
-from keras.utils import multi_gpu_model
-from keras.models import load_model
-from keras.optimizers import Adam
+import tensorflow as tf
+from tensorflow.keras.models import load_model, Model
+from tensorflow.keras.layers import Activation
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.utils import OrderedEnqueuer
 import numpy as np
+import threading
+import queue
+import copy
+import contextlib
+import warnings
+import math
+import os
+import tempfile
+import weakref
 # Internal libraries/scripts
 from miscnn.neural_network.metrics import dice_soft, tversky_loss
 from miscnn.neural_network.architecture.unet.standard import Architecture
@@ -54,49 +65,133 @@ class Neural_Network:
         learning_rate (float):                  Learning rate in which weights of the neural network will be updated.
         batch_queue_size (integer):             The batch queue size is the number of previously prepared batches in the cache during runtime.
         Number of workers (integer):            Number of workers/threads which preprocess batches during runtime.
-        gpu_number (integer):                   Number of GPUs, which will be used for training.
+        gpu_number (integer):                   Number of GPUs, which will be used for training. For more than one GPU,
+                                                the model is replicated on each GPU via a Tensorflow MirroredStrategy.
+        mixed_precision (boolean):              Option whether the model should be computed in mixed precision (float16 computations
+                                                with float32 weights) to reduce memory usage and to utilize tensor cores.
+                                                Mixed precision is only applied if a GPU is available.
+        xla (boolean):                          Option whether the model computations should be fused and compiled by the XLA
+                                                just-in-time compiler. XLA is only applied if a GPU is available and only
+                                                during training, evaluation and prediction of this model. Recommended for
+                                                fixed input shapes, because XLA recompiles the graphs for each new shape.
+        use_multiprocessing (boolean):          Option whether the workers should be processes instead of threads, which bypasses the
+                                                Python GIL for the batch generation during training. Requires a Preprocessor with
+                                                prepare_batches, because the batches generated during runtime depend on the sample
+                                                order of the Data Generator, which would be copied into each worker process.
+        learninig_rate (float):                 Deprecated alias of learning_rate.
+        distribution_backend (string):          Backend for the multi GPU training: "mirrored" replicates the model on
+                                                gpu_number GPUs via a Tensorflow MirroredStrategy, "horovod" runs one Horovod
+                                                process per GPU with NCCL all-reduce of the gradients (requires the horovod package
+                                                and a launch via horovodrun) and "none" disables the distribution.
+        initialization_on_disk (boolean):       Option whether the initial model weights for reset_weights should be cached in a temporary
+                                                HDF5 file instead of in device memory. Saves memory for large models at the cost
+                                                of a slower weight reset.
     """
     def __init__(self, preprocessor, architecture=Architecture(),
                  loss=tversky_loss, metrics=[dice_soft],
-                 learninig_rate=0.0001, batch_queue_size=2,
-                 workers=1, gpu_number=1):
+                 learning_rate=0.0001, batch_queue_size=2,
+                 workers=1, gpu_number=1, mixed_precision=True,
+                 xla=False, use_multiprocessing=False, learninig_rate=None,
+                 distribution_backend="mirrored", initialization_on_disk=False):
+        # Support the deprecated spelling of the learning rate parameter
+        if learninig_rate is not None:
+            warnings.warn("The parameter 'learninig_rate' is deprecated, " + \
+                          "use 'learning_rate' instead.", DeprecationWarning,
+                          stacklevel=2)
+            learning_rate = learninig_rate
+        # Initialize Horovod and pin a single GPU for this process
+        if distribution_backend == "horovod":
+            import horovod.tensorflow.keras as hvd
+            hvd.init()
+            gpus = tf.config.experimental.list_physical_devices("GPU")
+            for gpu in gpus:
+                tf.config.experimental.set_memory_growth(gpu, True)
+            if gpus:
+                tf.config.experimental.set_visible_devices(
+                                            gpus[hvd.local_rank()], "GPU")
+            # Scale the learning rate by the number of processes
+            learning_rate = learning_rate * hvd.size()
+            self.hvd = hvd
+        elif distribution_backend not in ["mirrored", "none"]:
+            raise ValueError("Unknown distribution backend: " + \
+                             str(distribution_backend))
+        self.learning_rate = learning_rate
+        # Verify that the batches can be generated by multiple processes
+        if use_multiprocessing and not preprocessor.prepare_batches:
+            raise ValueError("Multiprocessing requires a Preprocessor with " + \
+                             "prepare_batches, because batches generated " + \
+                             "during runtime would be duplicated by the " + \
+                             "worker processes.")
+        self.distribution_backend = distribution_backend
         # Identify data parameters
         self.three_dim = preprocessor.data_io.interface.three_dim
         self.channels = preprocessor.data_io.interface.channels
         self.classes = preprocessor.data_io.interface.classes
+        # Initialize the distribution strategy for multi GPU training
+        if distribution_backend == "mirrored" and gpu_number > 1:
+            gpu_devices = ["/gpu:" + str(i) for i in range(0, gpu_number)]
+            self.strategy = tf.distribute.MirroredStrategy(devices=gpu_devices)
+        else : self.strategy = tf.distribute.get_strategy()
+        # Activate mixed precision for the model creation if a GPU is available
+        self.mixed_precision = mixed_precision and \
+                               len(tf.config.list_logical_devices("GPU")) > 0
+        if self.mixed_precision:
+            global_policy = tf.keras.mixed_precision.global_policy()
+            tf.keras.mixed_precision.set_global_policy("mixed_float16")
+        # Activate XLA auto-clustering of the model graphs if a GPU is available
+        self.xla = xla and len(tf.config.list_logical_devices("GPU")) > 0
         # Assemble the input shape
         input_shape = (None,)
-        # Initialize model for 3D data
-        if self.three_dim:
-            input_shape = (None, None, None, self.channels)
-            self.model = architecture.create_model_3D(input_shape=input_shape,
-                                                      n_labels=self.classes)
-         # Initialize model for 2D data
-        else:
-             input_shape = (None, None, self.channels)
-             self.model = architecture.create_model_2D(input_shape=input_shape,
-                                                       n_labels=self.classes)
-        # Transform to Keras multi GPU model
-        if gpu_number > 1:
-            self.model = multi_gpu_model(self.model, gpu_number)
-        # Compile model
-        self.model.compile(optimizer=Adam(lr=learninig_rate),
-                           loss=loss, metrics=metrics)
-        # Cache starting weights
-        self.initialization_weights = self.model.get_weights()
+        # Create & compile model inside the scope of the distribution strategy
+        with self.strategy.scope():
+            # Initialize model for 3D data
+            if self.three_dim:
+                input_shape = (None, None, None, self.channels)
+                self.model = architecture.create_model_3D(input_shape=input_shape,
+                                                          n_labels=self.classes)
+            # Initialize model for 2D data
+            else:
+                input_shape = (None, None, self.channels)
+                self.model = architecture.create_model_2D(input_shape=input_shape,
+                                                          n_labels=self.classes)
+            # Ensure float32 predictions for the loss computation
+            if self.model.output.dtype != tf.float32:
+                outputs = Activation("linear", dtype="float32")(self.model.output)
+                self.model = Model(inputs=self.model.inputs, outputs=outputs)
+            # Compile model
+            self.model.compile(optimizer=self.create_optimizer(), loss=loss,
+                               metrics=metrics)
+            # Cache starting weights in a temporary file
+            if initialization_on_disk:
+                fd, self.initialization_file = tempfile.mkstemp(suffix=".h5")
+                os.close(fd)
+                self.model.save_weights(self.initialization_file)
+                # Remove the file with the object or at interpreter exit
+                weakref.finalize(self, os.remove, self.initialization_file)
+            # Cache starting weights as non-trainable variables on the device
+            else:
+                self.initialization_weights = [tf.Variable(var, trainable=False) \
+                                               for var in self.model.weights]
+        # Restore the previous global precision policy
+        if self.mixed_precision:
+            tf.keras.mixed_precision.set_global_policy(global_policy)
+        # Trace the model inference once into a concrete Tensorflow graph
+        self.create_inference()
         # Cache parameter
         self.preprocessor = preprocessor
         self.loss = loss
         self.metrics = metrics
-        self.learninig_rate = learninig_rate
         self.batch_queue_size = batch_queue_size
         self.workers = workers
+        self.use_multiprocessing = use_multiprocessing
 
     #---------------------------------------------#
     #               Class variables               #
     #---------------------------------------------#
     shuffle_batches = True                  # Option whether batch order should be shuffled or not
     initialization_weights = None           # Neural Network model weights for weight reinitialization
+    initialization_file = None              # Temporary file of the model weights for weight reinitialization
+    hvd = None                              # Horovod module for the Horovod distribution backend
 
     #---------------------------------------------#
     #                  Training                   #
@@ -112,15 +207,17 @@ class Neural_Network:
     """
     def train(self, sample_list, epochs=20, iterations=None, callbacks=[]):
         # Initialize Keras Data Generator for generating batches
-        dataGen = DataGenerator(sample_list, self.preprocessor, training=True,
+        dataGen = DataGenerator(self.distributed_samples(sample_list),
+                                self.preprocessor, training=True,
                                 validation=False, shuffle=self.shuffle_batches,
-                                iterations=iterations)
-        # Run training process with Keras fit_generator
-        self.model.fit_generator(generator=dataGen,
-                                 epochs=epochs,
-                                 callbacks=callbacks,
-                                 workers=self.workers,
-                                 max_queue_size=self.batch_queue_size)
+                                iterations=self.distributed_iterations(iterations))
+        # Run training process with Keras fit on a Tensorflow dataset
+        with self.xla_scope():
+            self.model.fit(self.to_dataset(dataGen),
+                           epochs=epochs,
+                           steps_per_epoch=self.distributed_steps(len(dataGen)),
+                           callbacks=self.distributed_callbacks(callbacks),
+                           verbose=self.verbose())
         # Clean up temporary files if necessary
         if self.preprocessor.prepare_batches or self.preprocessor.prepare_subfunctions:
             self.preprocessor.data_io.batch_cleanup()
@@ -130,32 +227,90 @@ class Neural_Network:
     #---------------------------------------------#
     """ Prediction function for the Neural Network model. The fitted model will predict a segmentation
         for the provided list of sample indices.
+        The preprocessing of the next samples and the postprocessing of the previous samples are performed
+        in background threads, while the model predicts the current sample.
 
     Args:
         sample_list (list of indices):  A list of sample indicies for which a segmentation prediction will be computed
         direct_output (boolean):        Parameter which decides, if computed predictions will be output as the return of this
                                         function or if the predictions will be saved with the save_prediction method defined
                                         in the provided Data I/O interface.
+                                        For the Horovod distribution backend, the samples are split between the processes
+                                        if the predictions are saved, whereas each process computes all predictions
+                                        for the direct output.
     """
     def predict(self, sample_list, direct_output=False):
         # Initialize result array for direct output
         if direct_output : results = []
-        # Iterate over each sample
-        for sample in sample_list:
-            # Initialize Keras Data Generator for generating batches
-            dataGen = DataGenerator([sample], self.preprocessor,
-                                    training=False, validation=False,
-                                    shuffle=False, iterations=None)
-            # Run prediction process with Keras predict_generator
-            pred_seg = self.model.predict_generator(generator=dataGen)
-            # Postprocess prediction
-            pred_seg = self.preprocessor.postprocessing(sample, pred_seg)
-            # Backup predicted segmentation
-            if direct_output : results.append(pred_seg)
-            else : self.preprocessor.data_io.save_prediction(pred_seg, sample)
-            # Clean up temporary files if necessary
-            if self.preprocessor.prepare_batches or self.preprocessor.prepare_subfunctions:
-                self.preprocessor.data_io.batch_cleanup()
+        # Otherwise save the predictions of each sample by a single process
+        else:
+            results = None
+            sample_list = self.distributed_samples(sample_list, training=False)
+        # Initialize bounded queues between the stages of the prediction pipeline
+        queue_batches = queue.Queue(maxsize=self.batch_queue_size)
+        queue_predictions = queue.Queue(maxsize=self.batch_queue_size)
+        stop = threading.Event()
+        errors = []
+        # Start preprocessing & postprocessing of the samples in background threads
+        thread_pre = threading.Thread(target=self.predict_preprocessing,
+                                      args=(sample_list, queue_batches, stop,
+                                            errors))
+        thread_post = threading.Thread(target=self.predict_postprocessing,
+                                       args=(queue_predictions, results,
+                                             errors))
+        thread_pre.start()
+        thread_post.start()
+        gpu_available = len(tf.config.list_logical_devices("GPU")) > 0
+        finished = False
+        try:
+            # Iterate over each preprocessed sample
+            for sample, batches, subfunctions in iter(queue_batches.get, None):
+                # Stop if the pre- or postprocessing failed
+                if errors : break
+                # Run prediction process on a Tensorflow dataset
+                dataset = self.to_dataset(batches, training=False)
+                with self.xla_scope():
+                    # Multi GPU: Run Keras predict on all replicas
+                    if self.strategy.num_replicas_in_sync > 1:
+                        pred_seg = self.model.predict(dataset, steps=len(batches))
+                    # Single GPU: Keep the predicted patches on the device
+                    elif gpu_available:
+                        pred_seg = tf.concat([self.inference(batch) for batch in \
+                                              dataset], axis=0)
+                    # CPU: Write predicted batches into a pre-sized output array
+                    else:
+                        n_patches = sum(len(batch) for batch in batches)
+                        pred_seg = None
+                        pointer = 0
+                        for batch in dataset:
+                            pred_batch = self.inference(batch).numpy()
+                            if pred_seg is None:
+                                pred_seg = np.empty((n_patches,) + \
+                                                    pred_batch.shape[1:],
+                                                    dtype=pred_batch.dtype)
+                            pred_seg[pointer:pointer+len(pred_batch)] = pred_batch
+                            pointer += len(pred_batch)
+                    # Reassemble predictions in GPU memory directly on the device,
+                    # so that only a single predicted volume occupies the GPU
+                    # (otherwise the reassembly is left to the postprocessing thread)
+                    reassembled = tf.is_tensor(pred_seg) and "GPU" in pred_seg.device
+                    if reassembled:
+                        pred_seg = self.preprocessor.reassemble(sample, pred_seg)
+                # Hand prediction over to the postprocessing
+                queue_predictions.put((sample, pred_seg, subfunctions,
+                                       reassembled))
+            else : finished = True
+        finally:
+            # Stop the preprocessing and drain its remaining output on failure
+            if not finished:
+                stop.set()
+                for _ in iter(queue_batches.get, None) : pass
+            # Wait until all predictions are postprocessed
+            queue_predictions.put(None)
+            thread_pre.join()
+            thread_post.join()
+        # Raise exceptions which occurred in the pre- or postprocessing
+        if errors : raise errors[0]
         # Output predictions results if direct output modus is active
         if direct_output : return results
 
@@ -179,22 +334,28 @@ class Neural_Network:
     def evaluate(self, training_samples, validation_samples, epochs=20,
                  iterations=None, callbacks=[]):
         # Initialize a Keras Data Generator for generating Training data
-        dataGen_training = DataGenerator(training_samples, self.preprocessor,
+        dataGen_training = DataGenerator(self.distributed_samples(training_samples),
+                                         self.preprocessor,
                                          training=True, validation=False,
                                          shuffle=self.shuffle_batches,
-                                         iterations=iterations)
+                                         iterations=self.distributed_iterations(
+                                                                    iterations))
         # Initialize a Keras Data Generator for generating Validation data
         dataGen_validation = DataGenerator(validation_samples,
                                            self.preprocessor,
                                            training=True, validation=True,
                                            shuffle=self.shuffle_batches)
-        # Run training & validation process with the Keras fit_generator
-        history = self.model.fit_generator(generator=dataGen_training,
-                                 validation_data=dataGen_validation,
-                                 callbacks=callbacks,
-                                 epochs=epochs,
-                                 workers=self.workers,
-                                 max_queue_size=self.batch_queue_size)
+        # Run training & validation process with Keras fit on Tensorflow datasets
+        with self.xla_scope():
+            history = self.model.fit(self.to_dataset(dataGen_training),
+                                     steps_per_epoch=self.distributed_steps(
+                                                        len(dataGen_training)),
+                                     validation_data=self.to_dataset(dataGen_validation,
+                                                                     validation=True),
+                                     validation_steps=len(dataGen_validation),
+                                     callbacks=self.distributed_callbacks(callbacks),
+                                     epochs=epochs,
+                                     verbose=self.verbose())
         # Clean up temporary files if necessary
         if self.preprocessor.prepare_batches or self.preprocessor.prepare_subfunctions:
             self.preprocessor.data_io.batch_cleanup()
@@ -204,18 +365,199 @@ class Neural_Network:
     #---------------------------------------------#
     #               Model Management              #
     #---------------------------------------------#
-    # Re-initialize model weights
+    # Re-initialize model weights by the cached weights
     def reset_weights(self):
-        self.model.set_weights(self.initialization_weights)
+        if self.initialization_file is not None:
+            self.model.load_weights(self.initialization_file)
+        else:
+            for var, init_var in zip(self.model.weights,
+                                     self.initialization_weights):
+                var.assign(init_var)
 
-    # Dump model to file
+    # Dump model to file (only by the first Horovod process)
     def dump(self, file_path):
-        self.model.save(file_path)
+        if self.hvd is None or self.hvd.rank() == 0:
+            self.model.save(file_path)
 
     # Load model from file
     def load(self, file_path, custom_objects={}):
-        # Create model input path
-        self.model = load_model(file_path, custom_objects, compile=False)
-        # Compile model
-        self.model.compile(optimizer=Adam(lr=self.learninig_rate),
-                           loss=self.loss, metrics=self.metrics)
+        # Register loss & metric functions of the model for deserialization
+        objects = {f.__name__ : f for f in [self.loss] + list(self.metrics) \
+                   if callable(f) and hasattr(f, "__name__")}
+        objects.update(custom_objects)
+        # Create model inside the scope of the distribution strategy
+        with self.strategy.scope():
+            # Restore the compiled model including its optimizer state
+            # (wrapped into a distributed optimizer for Horovod)
+            if self.hvd is not None:
+                self.model = self.hvd.load_model(file_path,
+                                                 custom_objects=objects)
+            else : self.model = load_model(file_path, objects, compile=True)
+            # Compile model if the file did not contain a training configuration
+            if self.model.optimizer is None:
+                self.model.compile(optimizer=self.create_optimizer(),
+                                   loss=self.loss, metrics=self.metrics)
+        # Trace the model inference of the loaded model
+        self.create_inference()
+
+    # Create the optimizer of the model (has to be called inside the scope of
+    # the distribution strategy)
+    def create_optimizer(self):
+        # Initialize optimizer and apply loss scaling for mixed precision
+        optimizer = Adam(learning_rate=self.learning_rate)
+        # Average the gradients of all Horovod processes via all-reduce
+        if self.hvd is not None:
+            optimizer = self.hvd.DistributedOptimizer(optimizer)
+        if self.mixed_precision:
+            optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+        # Return optimizer
+        return optimizer
+
+    #---------------------------------------------#
+    #                 Subroutines                 #
+    #---------------------------------------------#
+    # Preprocess the samples into batches for the prediction pipeline
+    def predict_preprocessing(self, sample_list, output_queue, stop, errors):
+        try:
+            # Iterate over each sample
+            for sample in sample_list:
+                if stop.is_set() : break
+                # Initialize Keras Data Generator for generating batches
+                dataGen = DataGenerator([sample], self.preprocessor,
+                                        training=False, validation=False,
+                                        shuffle=False, iterations=None)
+                # Gather all batches of the sample
+                batches = [dataGen[i] for i in range(0, len(dataGen))]
+                # Snapshot the subfunction states of the sample (e.g. original
+                # shape) before the next sample is preprocessed
+                subfunctions = [copy.copy(sf) for sf in \
+                                self.preprocessor.subfunctions]
+                # Clean up temporary files if necessary
+                if self.preprocessor.prepare_batches or \
+                    self.preprocessor.prepare_subfunctions:
+                    self.preprocessor.data_io.batch_cleanup()
+                # Hand batches over to the prediction
+                output_queue.put((sample, batches, subfunctions))
+        except Exception as e : errors.append(e)
+        # Signal the end of the preprocessing
+        finally : output_queue.put(None)
+
+    # Postprocess and backup the predictions of the prediction pipeline
+    def predict_postprocessing(self, input_queue, results, errors):
+        # Iterate over each predicted sample
+        for sample, pred_seg, subfunctions, reassembled in \
+            iter(input_queue.get, None):
+            # Skip remaining predictions if an error occurred before
+            if errors : continue
+            try:
+                # Postprocess prediction
+                pred_seg = self.preprocessor.postprocessing(sample, pred_seg,
+                                                            subfunctions,
+                                                            not reassembled)
+                # Backup predicted segmentation
+                if results is not None : results.append(pred_seg)
+                else : self.preprocessor.data_io.save_prediction(pred_seg,
+                                                                 sample)
+            except Exception as e : errors.append(e)
+
+    # Trace the model inference into a concrete Tensorflow function for
+    # batches of any size and spatial shape
+    def create_inference(self):
+        if self.three_dim : spatial_shape = (None, None, None, None)
+        else : spatial_shape = (None, None, None)
+        batch_spec = tf.TensorSpec(shape=spatial_shape + (self.channels,),
+                                   dtype=tf.float32)
+        inference = tf.function(lambda batch: self.model(batch, training=False),
+                                input_signature=[batch_spec])
+        self.inference = inference.get_concrete_function()
+
+    # Activate XLA auto-clustering for the model graphs which are built and run
+    # inside this context and restore the previous state afterwards
+    @contextlib.contextmanager
+    def xla_scope(self):
+        if not self.xla:
+            yield
+            return
+        jit_state = tf.config.optimizer.get_jit()
+        tf.config.optimizer.set_jit(True)
+        try : yield
+        finally : tf.config.optimizer.set_jit(jit_state)
+
+    # Split the samples between the Horovod processes
+    def distributed_samples(self, sample_list, training=True):
+        if self.hvd is None : return sample_list
+        # Each process requires at least one training sample
+        if training and len(sample_list) < self.hvd.size():
+            raise ValueError("Less training samples than Horovod processes!")
+        return sample_list[self.hvd.rank()::self.hvd.size()]
+
+    # Split the iterations of an epoch between the Horovod processes
+    def distributed_iterations(self, iterations):
+        if self.hvd is None or iterations is None : return iterations
+        else : return max(1, math.ceil(iterations / self.hvd.size()))
+
+    # Synchronize the steps of an epoch between the Horovod processes, which
+    # can differ for the split samples (all processes need the same number
+    # of gradient all-reduce operations)
+    def distributed_steps(self, steps):
+        if self.hvd is None : return steps
+        steps = self.hvd.allreduce(float(steps), op=self.hvd.Average)
+        return max(1, math.ceil(float(steps)))
+
+    # Extend the callbacks for the Horovod synchronization
+    def distributed_callbacks(self, callbacks):
+        if self.hvd is None : return callbacks
+        # Broadcast initial weights from the first process and average metrics
+        return [self.hvd.callbacks.BroadcastGlobalVariablesCallback(0),
+                self.hvd.callbacks.MetricAverageCallback()] + list(callbacks)
+
+    # Show the training progress only for the first Horovod process
+    def verbose(self):
+        if self.hvd is None or self.hvd.rank() == 0 : return 1
+        else : return 0
+
+    # Transform batches into a prefetching Tensorflow dataset
+    def to_dataset(self, batches, training=True, validation=False):
+        # Define the tensor signature of the image and segmentation batches
+        if self.three_dim : spatial_shape = (None, None, None, None)
+        else : spatial_shape = (None, None, None)
+        img_spec = tf.TensorSpec(shape=spatial_shape + (self.channels,),
+                                 dtype=tf.float32)
+        seg_spec = tf.TensorSpec(shape=spatial_shape + (self.classes,),
+                                 dtype=tf.float32)
+        # Training: Endless batch generation through multiple workers
+        if training and not validation:
+            def generator():
+                enqueuer = OrderedEnqueuer(batches,
+                                    use_multiprocessing=self.use_multiprocessing,
+                                    shuffle=False)
+                enqueuer.start(workers=self.workers,
+                               max_queue_size=self.batch_queue_size)
+                try : yield from enqueuer.get()
+                finally : enqueuer.stop()
+            signature = (img_spec, seg_spec)
+        # Validation & Prediction: Single pass through the batches, which is
+        # restarted by Keras for each validation run
+        else:
+            steps = len(batches)
+            def generator():
+                for i in range(0, steps):
+                    yield batches[i]
+                if training : batches.on_epoch_end()
+            if training : signature = (img_spec, seg_spec)
+            else : signature = img_spec
+        # Create the dataset and prefetch upcoming batches
+        dataset = tf.data.Dataset.from_generator(generator,
+                                                 output_signature=signature)
+        if not training or validation:
+            dataset = dataset.apply(
+                            tf.data.experimental.assert_cardinality(steps))
+        dataset = dataset.prefetch(tf.data.experimental.AUTOTUNE)
+        # Overlap the host to GPU copy of the next batch with the current step
+        # (a MirroredStrategy performs the distribution to its GPUs by itself)
+        if self.strategy.num_replicas_in_sync == 1 and \
+            tf.config.list_logical_devices("GPU"):
+            dataset = dataset.apply(tf.data.experimental.prefetch_to_device(
+                                    "/gpu:0", self.batch_queue_size))
+        # Return Tensorflow dataset
+        return dataset
@@ -21,12 +21,14 @@
 #-----------------------------------------------------#
 # External libraries
 import numpy as np
-from keras.utils import to_categorical
+import tensorflow as tf
+from tensorflow.keras.utils import to_categorical
 import threading
 # Internal libraries/scripts
 from miscnn.processing.data_augmentation import Data_Augmentation
 from miscnn.processing.batch_creation import create_batches
-from miscnn.utils.patch_operations import slice_matrix, concat_matrices, pad_patch, crop_patch
+from miscnn.utils.patch_operations import slice_matrix, concat_matrices_argmax, \
+                                          concat_matrices_argmax_tf, pad_patch, crop_patch
 
 #-----------------------------------------------------#
 #                 Preprocessor class                  #
@@ -180,7 +182,45 @@ class Preprocessor:
     #          Prediction Postprocessing          #
     #---------------------------------------------#
     # Postprocess prediction data
-    def postprocessing(self, sample, prediction):
+    ## Optionally, the subfunction instances which preprocessed the sample can be provided
+    ## and the reassembly can be skipped for an already reassembled prediction
+    def postprocessing(self, sample, prediction, subfunctions=None,
+                       reassemble=True):
+        # Reassemble the prediction into a class matrix
+        if reassemble : prediction = self.reassemble(sample, prediction)
+        # Run Subfunction postprocessing on the prediction
+        if subfunctions is None : subfunctions = self.subfunctions
+        lookup_table = None
+        for sf in reversed(subfunctions):
+            # Fuse element-wise subfunctions into a single class lookup table
+            if sf.is_elementwise:
+                if lookup_table is None:
+                    lookup_table = np.arange(self.data_io.interface.classes,
+                                             dtype=prediction.dtype)
+                lookup_table = sf.postprocessing(lookup_table)
+            # Apply the collected lookup table before other subfunctions
+            else:
+                prediction = self.apply_lookup_table(prediction, lookup_table)
+                lookup_table = None
+                prediction = sf.postprocessing(prediction)
+        prediction = self.apply_lookup_table(prediction, lookup_table)
+        # Return postprocessed prediction
+        return prediction
+
+    # Map the classes of a prediction in a single pass through a lookup table
+    def apply_lookup_table(self, prediction, lookup_table):
+        # Skip the pass for a missing or identity lookup table
+        if lookup_table is None or \
+            np.array_equal(lookup_table, np.arange(len(lookup_table))):
+            return prediction
+        # Apply lookup table on the prediction
+        return np.asarray(lookup_table)[prediction]
+
+    # Reassemble prediction data into a class matrix
+    def reassemble(self, sample, prediction):
+        # Keep only predictions in GPU memory on the device
+        on_gpu = tf.is_tensor(prediction) and "GPU" in prediction.device
+        if not on_gpu : prediction = np.asarray(prediction)
         # Reassemble patches into original shape for patchwise analysis
         if self.analysis == "patchwise-crop" or \
             self.analysis == "patchwise-grid":
@@ -189,18 +229,25 @@ class Preprocessor:
             if slice_key in self.cache:
                 prediction = crop_patch(prediction, self.cache[slice_key])
             # Load cached shape & Concatenate patches into original shape
+            # by directly transforming probabilities to classes
             seg_shape = self.cache.pop("shape_" + str(sample))
-            prediction = concat_matrices(patches=prediction,
-                                    image_size=seg_shape,
-                                    window=self.patch_shape,
-                                    overlap=self.patchwise_overlap,
-                                    three_dim=self.data_io.interface.three_dim)
-        # Transform probabilities to classes
-        prediction = np.argmax(prediction, axis=-1)
-        # Run Subfunction postprocessing on the prediction
-        for sf in reversed(self.subfunctions):
-            prediction = sf.postprocessing(prediction)
-        # Return postprocessed prediction
+            if on_gpu : concat = concat_matrices_argmax_tf
+            else : concat = concat_matrices_argmax
+            prediction = concat(patches=prediction,
+                                image_size=seg_shape,
+                                window=self.patch_shape,
+                                overlap=self.patchwise_overlap,
+                                three_dim=self.data_io.interface.three_dim)
+        # Transform probabilities to classes in the smallest fitting data type
+        elif on_gpu:
+            dtype = np.min_scalar_type(prediction.shape[-1] - 1)
+            prediction = tf.cast(tf.argmax(prediction, axis=-1),
+                                 tf.as_dtype(dtype)).numpy()
+        else:
+            dtype = np.min_scalar_type(prediction.shape[-1] - 1)
+            prediction = np.argmax(prediction, axis=-1).astype(dtype,
+                                                               copy=False)
+        # Return reassembled prediction
         return prediction
 
     #---------------------------------------------#
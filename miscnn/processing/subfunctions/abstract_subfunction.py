@@ -33,6 +33,16 @@ Methods:
     postprocessing:         Transform the predicted segmentation
 """
 class Abstract_Subfunction(ABC):
+    #---------------------------------------------#
+    #               Class variables               #
+    #---------------------------------------------#
+    """ Subfunctions, whose postprocessing maps each predicted class independently of the
+        other voxels (e.g. a class relabeling), can set is_elementwise to True.
+        Their postprocessing is then applied on the list of classes and the resulting lookup
+        tables of consecutive element-wise subfunctions are applied in a single pass
+        on the predicted segmentation.
+    """
+    is_elementwise = False
     #---------------------------------------------#
     #                   __init__                  #
     #---------------------------------------------#
@@ -35,6 +35,11 @@ Methods:
     postprocessing:         Do nothing
 """
 class Clipping(Abstract_Subfunction):
+    #---------------------------------------------#
+    #               Class variables               #
+    #---------------------------------------------#
+    is_elementwise = True           # Postprocessing maps each class independently
+
     #---------------------------------------------#
     #                Initialization               #
     #---------------------------------------------#
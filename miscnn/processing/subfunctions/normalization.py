@@ -36,6 +36,11 @@ Methods:
     postprocessing:         Do nothing
 """
 class Normalization(Abstract_Subfunction):
+    #---------------------------------------------#
+    #               Class variables               #
+    #---------------------------------------------#
+    is_elementwise = True           # Postprocessing maps each class independently
+
     #---------------------------------------------#
     #                Initialization               #
     #---------------------------------------------#
@@ -2,7 +2,7 @@
 #                   Library imports                   #
 #-----------------------------------------------------#
 #External libraries
-import keras
+from tensorflow import keras
 #Internal libraries
 from miscnn.data_io import save_evaluation
 
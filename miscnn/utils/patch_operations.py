@@ -22,6 +22,8 @@
 #External libraries
 import numpy as np
 import math
+import itertools
+import tensorflow as tf
 from batchgenerators.augmentations.utils import pad_nd_image
 
 #-----------------------------------------------------#
@@ -47,15 +49,11 @@ def pad_patch(patch, patch_shape, return_slicer=False):
         return padding_results
 
 def crop_patch(patch, slicer):
-    # Transform prediction from channel-last to channel-first structure
-    patch = np.moveaxis(patch, -1, 1)
-    # Exclude the number of batches and classes from the slice range
-    slicer[0] = slice(None)
-    slicer[1] = slice(None)
-    # Crop patches according to slicer
-    patch_cropped = patch[tuple(slicer)]
-    # Transform data from channel-first back to channel-last structure
-    patch_cropped = np.moveaxis(patch_cropped, 1, -1)
+    # Exclude the number of batches and classes from the slice range and
+    # apply the channel-first slicer on the channel-last structure
+    idx = [slice(None)] + list(slicer[2:]) + [slice(None)]
+    # Crop patches according to slicer (works for numpy arrays and tensors)
+    patch_cropped = patch[tuple(idx)]
     # Return cropped patch
     return patch_cropped
 
@@ -261,6 +259,130 @@ def concat_3Dmatrices(patches, image_size, window, overlap):
     # Return final combined matrix
     return(matrix_x)
 
+#-----------------------------------------------------#
+#     Concatenate Matrices with fused Class Argmax    #
+#-----------------------------------------------------#
+# Concatenate a list of prediction patches directly into a class matrix
+## Instead of a complete probability matrix, only a block of the matrix is
+## accumulated at once, from which the classes are identified via argmax.
+## The blocks are tiled by the window size along all axes, therefore the
+## accumulated probabilities of a block have the size of a single patch.
+## Overlapping patches are weighted equally (argmax of their summed probabilities),
+## therefore results can differ from concat_matrices wherever more than two patches overlap.
+def concat_matrices_argmax(patches, image_size, window, overlap, three_dim,
+                           dtype=None):
+    # Identify the number of spatial axes
+    if three_dim : axes = 3
+    else : axes = 2
+    # Calculate patch positions along each axis in the same order as the slicing
+    starts = [calculate_starts(image_size[axis], window[axis], overlap[axis])
+              for axis in range(0, axes)]
+    n_patches = [len(axis_starts) for axis_starts in starts]
+    # Identify the smallest unsigned integer type which can hold all classes
+    n_classes = patches[0].shape[-1]
+    if dtype is None : dtype = np.min_scalar_type(n_classes - 1)
+    # Initialize the class matrix
+    shape = tuple(image_size[0:axes])
+    matrix = np.empty(shape, dtype=dtype)
+    # Identify the patches along each axis which overlap with each block
+    patch_shape = patches[0].shape[0:axes]
+    block_patches = [calculate_block_patches(shape[axis], window[axis],
+                                             patch_shape[axis], starts[axis])
+                     for axis in range(0, axes)]
+    # Iterate over blocks of the class matrix
+    for block_index in itertools.product(*[range(0, len(blocks)) \
+                                           for blocks in block_patches]):
+        block_start = [block_index[axis] * window[axis] \
+                       for axis in range(0, axes)]
+        block_end = [min(block_start[axis] + window[axis], shape[axis]) \
+                     for axis in range(0, axes)]
+        # Accumulate the probabilities of all patches overlapping the block
+        block_shape = tuple(np.subtract(block_end, block_start))
+        block = np.zeros(block_shape + (n_classes,), dtype=np.float32)
+        for patch_index in itertools.product(*[block_patches[axis][block_index[axis]] \
+                                               for axis in range(0, axes)]):
+            # Calculate pointer from the axis positions to the list of patches
+            pointer = np.ravel_multi_index(patch_index, n_patches)
+            # Identify the intersection of the patch and the block
+            idx_block = []
+            idx_patch = []
+            for axis in range(0, axes):
+                position = starts[axis][patch_index[axis]]
+                start = max(position, block_start[axis])
+                end = min(position + patch_shape[axis], block_end[axis])
+                idx_block.append(slice(start - block_start[axis],
+                                       end - block_start[axis]))
+                idx_patch.append(slice(start - position, end - position))
+            block[tuple(idx_block)] += patches[pointer][tuple(idx_patch)]
+        # Transform probabilities of the block to classes
+        idx_matrix = tuple(slice(start, end) for start, end in \
+                           zip(block_start, block_end))
+        matrix[idx_matrix] = np.argmax(block, axis=-1)
+    # Return final class matrix
+    return matrix
+
+# Concatenate a tensor of prediction patches into a class matrix on the device
+## The patches stay in GPU memory and only the final class matrix is
+## transferred back to the host. Analogous to concat_matrices_argmax, the
+## matrix is assembled slab by slab along the first axis.
+def concat_matrices_argmax_tf(patches, image_size, window, overlap, three_dim,
+                              dtype=None):
+    # Identify the number of spatial axes
+    if three_dim : axes = 3
+    else : axes = 2
+    # Calculate patch positions in the same order as the slicing
+    starts = [calculate_starts(image_size[axis], window[axis], overlap[axis])
+              for axis in range(0, axes)]
+    positions = np.array(list(itertools.product(*starts)), dtype=np.int32)
+    # Identify the smallest unsigned integer type which can hold all classes
+    n_classes = patches.shape[-1]
+    if dtype is None : dtype = np.min_scalar_type(n_classes - 1)
+    # Initialize the class matrix
+    shape = tuple(image_size[0:axes])
+    matrix = np.empty(shape, dtype=dtype)
+    patch_length = patches.shape[1]
+    # Iterate over slabs of the class matrix along the first axis
+    for slab_start in range(0, shape[0], window[0]):
+        slab_end = min(slab_start + window[0], shape[0])
+        # Identify all patches overlapping the slab
+        ids = np.nonzero((positions[:,0] < slab_end) & \
+                         (positions[:,0] + patch_length > slab_start))[0]
+        # Define a buffer which completely contains these patches
+        buffer_start = int(positions[ids,0].min())
+        buffer_end = int(positions[ids,0].max()) + patch_length
+        buffer_positions = positions[ids]
+        buffer_positions[:,0] -= buffer_start
+        buffer_shape = (buffer_end - buffer_start,) + shape[1:]
+        # Scatter patches into the buffer and transform probabilities of
+        # the slab to classes
+        slab = scatter_patches_argmax(tf.gather(patches, ids),
+                                      tf.constant(buffer_positions),
+                                      tf.constant(buffer_shape, dtype=tf.int32),
+                                      tf.constant(slab_start - buffer_start),
+                                      tf.constant(slab_end - buffer_start),
+                                      axes, tf.as_dtype(dtype))
+        matrix[slab_start:slab_end] = slab.numpy()
+    # Return final class matrix
+    return matrix
+
+# Scatter-add patches into a probability buffer and identify the classes
+@tf.function(experimental_relax_shapes=True)
+def scatter_patches_argmax(patches, positions, shape, core_start, core_end,
+                           axes, dtype):
+    # Compute the voxel indices inside a single patch
+    patch_shape = tf.shape(patches)[1:-1]
+    offsets = tf.meshgrid(*[tf.range(patch_shape[axis]) for axis in \
+                            range(0, axes)], indexing="ij")
+    offsets = tf.expand_dims(tf.stack(offsets, axis=-1), axis=0)
+    # Compute the voxel indices of all patches at their positions
+    indices = offsets + tf.reshape(positions, [-1] + [1] * axes + [axes])
+    # Add up the probabilities of all patches in a single scatter operation
+    n_classes = tf.shape(patches)[-1:]
+    buffer = tf.scatter_nd(indices, patches, tf.concat([shape, n_classes],
+                                                       axis=0))
+    # Transform probabilities of the slab to classes
+    return tf.cast(tf.argmax(buffer[core_start:core_end], axis=-1), dtype)
+
 #-----------------------------------------------------#
 #          Subroutines for the Concatenation          #
 #-----------------------------------------------------#
@@ -278,6 +400,29 @@ def calculate_overlap(pointer, steps, overlap, image_size, window, axis):
             # Return overlap
             return current_overlap
 
+# Calculate the start positions of the patches along an axis
+def calculate_starts(size, window, overlap):
+    # Calculate steps
+    steps = int(math.ceil((size - overlap) / float(window - overlap)))
+    # Define window starts
+    starts = []
+    for i in range(0, steps):
+        start = i*window - i*overlap
+        # Create an overlapping patch for the last images / edges
+        if start + window > size : start = max(size - window, 0)
+        starts.append(start)
+    return starts
+
+# Identify the patch positions along an axis which overlap with each block
+def calculate_block_patches(size, window, patch_size, starts):
+    block_patches = []
+    for block_start in range(0, size, window):
+        block_end = min(block_start + window, size)
+        block_patches.append([i for i, start in enumerate(starts) \
+                              if start < block_end and \
+                              start + patch_size > block_start])
+    return block_patches
+
 # Handle the overlap of two overlapping matrices
 def handle_overlap(matrixA, matrixB, overlap, axis):
     # Access overllaping slice from matrix A
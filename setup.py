@@ -16,9 +16,8 @@ setup(
    long_description=long_description,
    long_description_content_type="text/markdown",
    packages=find_packages(),
-   install_requires=['numpy==1.16.4',
-                     'tensorflow-gpu==1.13.1',
-                     'Keras>=2.2.4',
+   install_requires=['numpy>=1.19.2',
+                     'tensorflow>=2.4.0,<2.16',
                      'nibabel>=2.4.0',
                      'matplotlib>=3.0.3',
                      'batchgenerators>=0.19.3'],
@@ -0,0 +1,104 @@
+#==============================================================================#
+#  Author:       Dominik Müller                                                #
+#  Copyright:    2019 IT-Infrastructure for Translational Medical Research,    #
+#                University of Augsburg                                        #
+#                                                                              #
+#  This program is free software: you can redistribute it and/or modify        #
+#  it under the terms of the GNU General Public License as published by        #
+#  the Free Software Foundation, either version 3 of the License, or           #
+#  (at your option) any later version.                                         #
+#                                                                              #
+#  This program is distributed in the hope that it will be useful,             #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+#  GNU General Public License for more details.                                #
+#                                                                              #
+#  You should have received a copy of the GNU General Public License           #
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#==============================================================================#
+#-----------------------------------------------------#
+#                   Library imports                   #
+#-----------------------------------------------------#
+# External libraries
+import unittest
+import numpy as np
+import tensorflow as tf
+# Internal libraries/scripts
+from miscnn.utils.patch_operations import slice_matrix, concat_matrices, \
+                                          concat_matrices_argmax, \
+                                          concat_matrices_argmax_tf
+
+#-----------------------------------------------------#
+#               Unittest: Patch Operations            #
+#-----------------------------------------------------#
+class PatchOperationsTEST(unittest.TestCase):
+    # Create random prediction patches for a given image shape
+    def create_patches(self, image_size, window, overlap, three_dim,
+                       classes=3):
+        np.random.seed(1234)
+        image = np.random.rand(*(image_size + (classes,)))
+        patches = slice_matrix(image, window, overlap, three_dim)
+        # Replace each patch with individual random probabilities
+        return [np.random.rand(*patch.shape) for patch in patches]
+
+    # Compare with the argmax of the averaging concatenation function
+    def compare_concat(self, image_size, window, overlap, three_dim):
+        patches = self.create_patches(image_size, window, overlap, three_dim)
+        ref = concat_matrices([p.copy() for p in patches], image_size + (1,),
+                              window, overlap, three_dim)
+        ref = np.argmax(ref, axis=-1)
+        pred = concat_matrices_argmax(patches, image_size + (1,), window,
+                                      overlap, three_dim)
+        self.assertEqual(pred.dtype, np.uint8)
+        self.assertTrue(np.array_equal(pred, ref))
+
+    #-------------------------------------------------#
+    #             Concatenation with Argmax           #
+    #-------------------------------------------------#
+    def test_concat_argmax_3D_without_overlap(self):
+        self.compare_concat((16,24,8), (8,8,8), (0,0,0), three_dim=True)
+
+    def test_concat_argmax_3D_two_patch_overlap(self):
+        self.compare_concat((12,8,8), (8,8,8), (4,0,0), three_dim=True)
+
+    def test_concat_argmax_2D_without_overlap(self):
+        self.compare_concat((16,24), (8,8), (0,0), three_dim=False)
+
+    def test_concat_argmax_2D_two_patch_overlap(self):
+        self.compare_concat((8,14), (8,8), (0,2), three_dim=False)
+
+    def test_concat_argmax_dtype(self):
+        patches = self.create_patches((8,8), (8,8), (0,0), three_dim=False,
+                                      classes=300)
+        pred = concat_matrices_argmax(patches, (8,8,1), (8,8), (0,0),
+                                      three_dim=False)
+        self.assertEqual(pred.dtype, np.uint16)
+        self.assertEqual(pred.max(), np.argmax(patches[0], axis=-1).max())
+
+    #-------------------------------------------------#
+    #      Concatenation with Argmax on the Device    #
+    #-------------------------------------------------#
+    def test_concat_argmax_tf_3D(self):
+        patches = self.create_patches((20,17,13), (8,8,8), (2,3,1), True)
+        ref = concat_matrices_argmax(patches, (20,17,13,1), (8,8,8), (2,3,1),
+                                     three_dim=True)
+        pred = concat_matrices_argmax_tf(tf.constant(np.stack(patches)),
+                                         (20,17,13,1), (8,8,8), (2,3,1),
+                                         three_dim=True)
+        self.assertEqual(pred.dtype, np.uint8)
+        self.assertTrue(np.array_equal(pred, ref))
+
+    def test_concat_argmax_tf_2D(self):
+        patches = self.create_patches((20,17), (8,8), (2,3), False)
+        ref = concat_matrices_argmax(patches, (20,17,1), (8,8), (2,3),
+                                     three_dim=False)
+        pred = concat_matrices_argmax_tf(tf.constant(np.stack(patches)),
+                                         (20,17,1), (8,8), (2,3),
+                                         three_dim=False)
+        self.assertTrue(np.array_equal(pred, ref))
+
+#-----------------------------------------------------#
+#               Unittest: Main Function               #
+#-----------------------------------------------------#
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#==============================================================================#
+#  Author:       Dominik Müller                                                #
+#  Copyright:    2019 IT-Infrastructure for Translational Medical Research,    #
+#                University of Augsburg                                        #
+#                                                                              #
+#  This program is free software: you can redistribute it and/or modify        #
+#  it under the terms of the GNU General Public License as published by        #
+#  the Free Software Foundation, either version 3 of the License, or           #
+#  (at your option) any later version.                                         #
+#                                                                              #
+#  This program is distributed in the hope that it will be useful,             #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+#  GNU General Public License for more details.                                #
+#                                                                              #
+#  You should have received a copy of the GNU General Public License           #
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#==============================================================================#
+#-----------------------------------------------------#
+#                   Library imports                   #
+#-----------------------------------------------------#
+# External libraries
+import unittest
+import numpy as np
+# Internal libraries/scripts
+from miscnn.data_loading.interfaces.dictionary_io import Dictionary_interface
+from miscnn.data_loading.data_io import Data_IO
+from miscnn.processing.preprocessor import Preprocessor
+from miscnn.processing.subfunctions.abstract_subfunction import Abstract_Subfunction
+from miscnn.processing.subfunctions.normalization import Normalization
+
+#-----------------------------------------------------#
+#                 Testing Subfunctions                #
+#-----------------------------------------------------#
+# Element-wise relabeling of the classes via a lookup table
+class Relabeling(Abstract_Subfunction):
+    is_elementwise = True
+    def __init__(self, mapping):
+        self.mapping = np.asarray(mapping)
+        self.calls = 0
+    def preprocessing(self, sample, training=True):
+        pass
+    def postprocessing(self, prediction):
+        self.calls += 1
+        return self.mapping[prediction]
+
+# Non element-wise postprocessing which depends on the neighboring voxels
+class Neighborhood_Minimum(Abstract_Subfunction):
+    def __init__(self):
+        pass
+    def preprocessing(self, sample, training=True):
+        pass
+    def postprocessing(self, prediction):
+        return np.minimum(prediction, np.roll(prediction, 1, axis=0))
+
+#-----------------------------------------------------#
+#            Unittest: Subfunction Postprocessing     #
+#-----------------------------------------------------#
+class PostprocessingTEST(unittest.TestCase):
+    # Create a Preprocessor and a random 3 class prediction
+    def setUp(self):
+        np.random.seed(1234)
+        interface = Dictionary_interface({}, channels=1, classes=3,
+                                         three_dim=True)
+        data_io = Data_IO(interface, "", delete_batchDir=False)
+        self.pp = Preprocessor(data_io, batch_size=1, data_aug=None,
+                               analysis="fullimage")
+        self.prediction = np.random.randint(0, 3, (8,6,4)).astype(np.uint8)
+
+    # Apply the subfunction postprocessing sequentially on the prediction
+    def sequential_postprocessing(self, subfunctions):
+        prediction = self.prediction
+        for sf in reversed(subfunctions):
+            prediction = sf.postprocessing(prediction)
+        return prediction
+
+    #-------------------------------------------------#
+    #            Fused Lookup Table Passes            #
+    #-------------------------------------------------#
+    def test_postprocessing_fused_relabeling(self):
+        subfunctions = [Relabeling([1,2,0]), Neighborhood_Minimum(),
+                        Relabeling([2,1,0]), Normalization(),
+                        Relabeling([0,0,2])]
+        ref = self.sequential_postprocessing(subfunctions)
+        pred = self.pp.postprocessing(None, self.prediction, subfunctions,
+                                      reassemble=False)
+        self.assertTrue(np.array_equal(pred, ref))
+
+    def test_postprocessing_lookup_table_pass(self):
+        subfunctions = [Relabeling([1,2,0]), Relabeling([2,0,1])]
+        pred = self.pp.postprocessing(None, self.prediction, subfunctions,
+                                      reassemble=False)
+        # The element-wise subfunctions are applied on the class list only
+        # and compose to the identity, which skips the pass over the volume
+        self.assertIs(pred, self.prediction)
+        self.assertEqual([sf.calls for sf in subfunctions], [1, 1])
+
+#-----------------------------------------------------#
+#               Unittest: Main Function               #
+#-----------------------------------------------------#
+if __name__ == '__main__':
+    unittest.main()
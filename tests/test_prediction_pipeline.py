@@ -0,0 +1,141 @@
+#==============================================================================#
+#  Author:       Dominik Müller                                                #
+#  Copyright:    2019 IT-Infrastructure for Translational Medical Research,    #
+#                University of Augsburg                                        #
+#                                                                              #
+#  This program is free software: you can redistribute it and/or modify        #
+#  it under the terms of the GNU General Public License as published by        #
+#  the Free Software Foundation, either version 3 of the License, or           #
+#  (at your option) any later version.                                         #
+#                                                                              #
+#  This program is distributed in the hope that it will be useful,             #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+#  GNU General Public License for more details.                                #
+#                                                                              #
+#  You should have received a copy of the GNU General Public License           #
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#==============================================================================#
+#-----------------------------------------------------#
+#                   Library imports                   #
+#-----------------------------------------------------#
+# External libraries
+import unittest
+import tempfile
+import threading
+import os
+import numpy as np
+# Internal libraries/scripts
+from miscnn.data_loading.interfaces.dictionary_io import Dictionary_interface
+from miscnn.data_loading.data_io import Data_IO
+from miscnn.processing.preprocessor import Preprocessor
+from miscnn.processing.subfunctions.abstract_subfunction import Abstract_Subfunction
+from miscnn.processing.subfunctions.resize import Resize
+from miscnn.neural_network.model import Neural_Network
+from miscnn.neural_network.architecture.unet.standard import Architecture
+
+#-----------------------------------------------------#
+#              Subfunction: Raise on Output           #
+#-----------------------------------------------------#
+class Failing_Postprocessing(Abstract_Subfunction):
+    def __init__(self):
+        pass
+    def preprocessing(self, sample, training=True):
+        pass
+    def postprocessing(self, prediction):
+        raise ValueError("Postprocessing failed")
+
+#-----------------------------------------------------#
+#             Unittest: Prediction Pipeline           #
+#-----------------------------------------------------#
+class PredictionPipelineTEST(unittest.TestCase):
+    # Create a dictionary data set with differently shaped 2D samples
+    @classmethod
+    def setUpClass(self):
+        np.random.seed(1234)
+        self.shapes = [(20,24), (28,16), (16,32), (24,20), (32,28)]
+        self.dictionary = {}
+        for i, shape in enumerate(self.shapes):
+            img = np.random.rand(*(shape + (1,))).astype(np.float32)
+            seg = np.random.randint(0, 2, shape + (1,))
+            self.dictionary["sample_" + str(i)] = (img, seg, None, {})
+        self.sample_list = list(self.dictionary.keys())
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(self):
+        self.tmp_dir.cleanup()
+
+    # Create a small 2D model for the provided pipeline configuration
+    def create_model(self, subfunctions=[], analysis="patchwise-grid"):
+        interface = Dictionary_interface(self.dictionary, channels=1,
+                                         classes=2, three_dim=False)
+        data_io = Data_IO(interface, self.tmp_dir.name,
+                          output_path=os.path.join(self.tmp_dir.name, "pred"),
+                          batch_path=os.path.join(self.tmp_dir.name, "batches"),
+                          delete_batchDir=False)
+        pp = Preprocessor(data_io, batch_size=2, subfunctions=subfunctions,
+                          data_aug=None, prepare_subfunctions=False,
+                          prepare_batches=False, analysis=analysis,
+                          patch_shape=(16,16))
+        pp.patchwise_overlap = (4,4)
+        return Neural_Network(pp, architecture=Architecture(n_filters=2,
+                                                            depth=2))
+
+    # Run the prediction in a thread to detect a hanging pipeline
+    def predict_with_timeout(self, model, sample_list, timeout=120):
+        outcome = {}
+        def run():
+            try : outcome["result"] = model.predict(sample_list,
+                                                    direct_output=True)
+            except Exception as e : outcome["error"] = e
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), "Prediction pipeline hangs")
+        return outcome
+
+    #-------------------------------------------------#
+    #                  Result Ordering                #
+    #-------------------------------------------------#
+    def test_predict_order(self):
+        model = self.create_model()
+        outcome = self.predict_with_timeout(model, self.sample_list)
+        self.assertNotIn("error", outcome)
+        results = outcome["result"]
+        self.assertEqual(len(results), len(self.sample_list))
+        # Compare with the prediction of each sample on its own
+        for i, sample in enumerate(self.sample_list):
+            self.assertEqual(results[i].shape, self.shapes[i])
+            single = model.predict([sample], direct_output=True)[0]
+            self.assertTrue(np.array_equal(results[i], single))
+
+    #-------------------------------------------------#
+    #                 Error Propagation               #
+    #-------------------------------------------------#
+    def test_predict_preprocessing_error(self):
+        model = self.create_model()
+        sample_list = self.sample_list[:2] + ["missing"] + self.sample_list[2:]
+        outcome = self.predict_with_timeout(model, sample_list)
+        self.assertIsInstance(outcome.get("error"), KeyError)
+
+    def test_predict_postprocessing_error(self):
+        model = self.create_model(subfunctions=[Failing_Postprocessing()])
+        outcome = self.predict_with_timeout(model, self.sample_list)
+        self.assertIsInstance(outcome.get("error"), ValueError)
+
+    #-------------------------------------------------#
+    #             Per-Sample Subfunction State        #
+    #-------------------------------------------------#
+    def test_predict_resize_original_shape(self):
+        model = self.create_model(subfunctions=[Resize((24,24))])
+        outcome = self.predict_with_timeout(model, self.sample_list)
+        self.assertNotIn("error", outcome)
+        for i, pred in enumerate(outcome["result"]):
+            self.assertEqual(pred.shape, self.shapes[i])
+
+#-----------------------------------------------------#
+#               Unittest: Main Function               #
+#-----------------------------------------------------#
+if __name__ == '__main__':
+    unittest.main()
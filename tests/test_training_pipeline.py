@@ -0,0 +1,100 @@
+#==============================================================================#
+#  Author:       Dominik Müller                                                #
+#  Copyright:    2019 IT-Infrastructure for Translational Medical Research,    #
+#                University of Augsburg                                        #
+#                                                                              #
+#  This program is free software: you can redistribute it and/or modify        #
+#  it under the terms of the GNU General Public License as published by        #
+#  the Free Software Foundation, either version 3 of the License, or           #
+#  (at your option) any later version.                                         #
+#                                                                              #
+#  This program is distributed in the hope that it will be useful,             #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+#  GNU General Public License for more details.                                #
+#                                                                              #
+#  You should have received a copy of the GNU General Public License           #
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#==============================================================================#
+#-----------------------------------------------------#
+#                   Library imports                   #
+#-----------------------------------------------------#
+# External libraries
+import unittest
+import tempfile
+import os
+import numpy as np
+# Internal libraries/scripts
+from miscnn.data_loading.interfaces.dictionary_io import Dictionary_interface
+from miscnn.data_loading.data_io import Data_IO
+from miscnn.processing.preprocessor import Preprocessor
+from miscnn.neural_network.data_generator import DataGenerator
+from miscnn.neural_network.model import Neural_Network
+from miscnn.neural_network.architecture.unet.standard import Architecture
+
+#-----------------------------------------------------#
+#              Unittest: Training Pipeline            #
+#-----------------------------------------------------#
+class TrainingPipelineTEST(unittest.TestCase):
+    # Create a dictionary data set in which each image is filled with its index
+    def setUp(self):
+        self.n_samples = 8
+        self.dictionary = {}
+        for i in range(0, self.n_samples):
+            img = np.full((8,8,1), i, dtype=np.float32)
+            seg = np.zeros((8,8,1), dtype=np.uint8)
+            self.dictionary["sample_" + str(i)] = (img, seg, None, {})
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # Create a Preprocessor for single sample batches
+    def create_preprocessor(self, prepare_batches):
+        interface = Dictionary_interface(self.dictionary, channels=1,
+                                         classes=2, three_dim=False)
+        data_io = Data_IO(interface, self.tmp_dir.name,
+                          output_path=os.path.join(self.tmp_dir.name, "pred"),
+                          batch_path=os.path.join(self.tmp_dir.name, "batches"))
+        return Preprocessor(data_io, batch_size=1, data_aug=None,
+                            prepare_batches=prepare_batches,
+                            analysis="fullimage")
+
+    # Collect the sample indices of a single training epoch
+    def run_epoch(self, prepare_batches, use_multiprocessing):
+        pp = self.create_preprocessor(prepare_batches)
+        model = Neural_Network(pp, architecture=Architecture(n_filters=2,
+                                                            depth=2),
+                               workers=4,
+                               use_multiprocessing=use_multiprocessing)
+        dataGen = DataGenerator(list(self.dictionary.keys()), pp,
+                                training=True, shuffle=True)
+        dataset = model.to_dataset(dataGen)
+        return sorted(int(img[0,0,0,0]) for img, seg in \
+                      dataset.take(len(dataGen)).as_numpy_iterator())
+
+    #-------------------------------------------------#
+    #                  Epoch Coverage                 #
+    #-------------------------------------------------#
+    def test_epoch_coverage_threads(self):
+        samples = self.run_epoch(prepare_batches=False,
+                                 use_multiprocessing=False)
+        self.assertEqual(samples, list(range(0, self.n_samples)))
+
+    def test_epoch_coverage_multiprocessing(self):
+        samples = self.run_epoch(prepare_batches=True,
+                                 use_multiprocessing=True)
+        self.assertEqual(samples, list(range(0, self.n_samples)))
+
+    def test_multiprocessing_runtime_batches(self):
+        pp = self.create_preprocessor(prepare_batches=False)
+        with self.assertRaises(ValueError):
+            Neural_Network(pp, architecture=Architecture(n_filters=2,
+                                                         depth=2),
+                           workers=4, use_multiprocessing=True)
+
+#-----------------------------------------------------#
+#               Unittest: Main Function               #
+#-----------------------------------------------------#
+if __name__ == '__main__':
+    unittest.main()